@@ -0,0 +1,312 @@
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from py_scripts.queries import get_connection
+
+os.makedirs('logs', exist_ok=True)
+
+CACHE_DIR = './cache/history'
+
+HISTORY_QUERY = """
+    SELECT video_id, title, channel_id, channel_title, view_count, like_count, comment_count, rank, fetched_date
+    FROM youtube_data;
+"""
+
+# Generation counter bumped by the loaders in load.py; the main invalidation signal
+GENERATION_QUERY = """
+    SELECT generation FROM youtube_data_generation WHERE id = 1;
+"""
+
+# Cheap fingerprint over every cached column, to also catch writes that bypass the loaders
+FRESHNESS_QUERY = """
+    SELECT COUNT(*), MAX(fetched_date), SUM(view_count), SUM(like_count), SUM(comment_count), SUM(rank),
+           SUM(LENGTH(video_id)), SUM(LENGTH(title)), SUM(LENGTH(channel_id)), SUM(LENGTH(channel_title))
+    FROM youtube_data;
+"""
+
+# Per-row arrays, saved as one .npy each so they can be memory-mapped on load
+ARRAY_COLUMNS = ['video', 'channel', 'date', 'view_count', 'like_count', 'comment_count', 'rank']
+
+
+class SnapshotHistory:
+    """
+    Compact, array-backed copy of the whole youtube_data table.
+
+    Rows are sorted by (date, video) and stored column-wise: video, channel and date are
+    integer codes into the id/title lists, the counters and rank are int64. date_offsets
+    holds where each day starts, so one day's snapshot is a plain slice.
+
+    The query methods return the same frames as the functions in queries.py, without
+    going back to the database. freshness is the load generation plus the FRESHNESS_QUERY
+    fingerprint the history was built against, used by load_history to spot a stale cache.
+    """
+
+    def __init__(self, arrays, video_ids, video_titles, channel_ids, channel_titles, dates, freshness=None):
+        self.video = arrays['video']
+        self.channel = arrays['channel']
+        self.date = arrays['date']
+        self.view_count = arrays['view_count']
+        self.like_count = arrays['like_count']
+        self.comment_count = arrays['comment_count']
+        self.rank = arrays['rank']
+        self.video_ids = np.asarray(video_ids, dtype=object)
+        self.video_titles = np.asarray(video_titles, dtype=object)
+        self.channel_ids = np.asarray(channel_ids, dtype=object)
+        self.channel_titles = np.asarray(channel_titles, dtype=object)
+        self.dates = list(dates)
+        self.freshness = freshness
+        self.date_offsets = np.searchsorted(self.date, np.arange(len(self.dates) + 1))
+
+    def __len__(self):
+        return len(self.video)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Builds the history from youtube_data rows (or the output of transform_youtube_data)."""
+        if 'fetched_date' not in df.columns and 'fetch_date' in df.columns:
+            df = df.rename(columns={'fetch_date': 'fetched_date'})
+        df = df.assign(fetched_date=pd.to_datetime(df.fetched_date).dt.strftime('%Y-%m-%d'))
+
+        date_codes, dates = pd.factorize(df.fetched_date, sort=True)
+        video_codes, video_ids = pd.factorize(df.video_id, sort=True)
+        channel_codes, channel_ids = pd.factorize(df.channel_id, sort=True)
+        order = np.lexsort((video_codes, date_codes))
+
+        # Titles can change between snapshots, keep the latest one like the queries do
+        titles = df.iloc[order]
+        video_titles = titles.groupby(video_codes[order], sort=True).title.last()
+        channel_titles = titles.groupby(channel_codes[order], sort=True).channel_title.last()
+
+        def counter(col):
+            return pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy(np.int64)[order]
+
+        arrays = {
+            'video': video_codes[order].astype(np.int32),
+            'channel': channel_codes[order].astype(np.int32),
+            'date': date_codes[order].astype(np.int32),
+            'view_count': counter('view_count'),
+            'like_count': counter('like_count'),
+            'comment_count': counter('comment_count'),
+            'rank': counter('rank'),
+        }
+        return cls(arrays, list(video_ids), video_titles.astype(str).tolist(),
+                   list(channel_ids), channel_titles.astype(str).tolist(), list(dates))
+
+    @classmethod
+    def from_database(cls):
+        conn = None
+        try:
+            conn = get_connection()
+            freshness = fetch_freshness(conn)
+            df = pd.read_sql_query(HISTORY_QUERY, conn)
+            logging.info(f"Read {len(df)} rows of youtube_data history ✅")
+        except Exception as e:
+            logging.error(f"Error reading youtube_data history: {e}")
+            raise
+        finally:
+            if conn: conn.close()
+        history = cls.from_dataframe(df)
+        history.freshness = freshness
+        return history
+
+    def save(self, cache_dir=CACHE_DIR):
+        """
+        Every file is written under a temporary name and swapped in with os.replace, so
+        histories already memory-mapping the old files (including this one) stay valid.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        meta_path = os.path.join(cache_dir, 'meta.json')
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        for name in ARRAY_COLUMNS:
+            path = os.path.join(cache_dir, f"{name}.npy")
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, np.ascontiguousarray(getattr(self, name)))
+            os.replace(path + '.tmp', path)
+        meta = {
+            'video_ids': self.video_ids.tolist(),
+            'video_titles': self.video_titles.tolist(),
+            'channel_ids': self.channel_ids.tolist(),
+            'channel_titles': self.channel_titles.tolist(),
+            'dates': self.dates,
+            'freshness': self.freshness,
+        }
+        # Written last, so a half-written cache is never picked up by load()
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+        logging.info(f"Saved history cache with {len(self)} rows to {cache_dir} ✅")
+
+    @classmethod
+    def load(cls, cache_dir=CACHE_DIR):
+        """Memory-maps a cache written by save(); the arrays are only paged in when read."""
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode='r')
+                  for name in ARRAY_COLUMNS}
+        return cls(arrays, **meta)
+
+    # --- helpers -------------------------------------------------------------
+
+    def _day(self, offset=-1):
+        """Row slice of a snapshot date, -1 being the latest. None if there is no such date."""
+        n = len(self.dates)
+        i = offset + n if offset < 0 else offset
+        if not 0 <= i < n:
+            return None, None
+        return slice(self.date_offsets[i], self.date_offsets[i + 1]), self.dates[i]
+
+    def _previous_rows(self, day):
+        """
+        For each row of the day slice, the index of the same video's most recent earlier
+        row (the LAG in the SQL queries), or -1 when the video was never seen before.
+        """
+        earlier = self.video[:day.start]
+        # Rows are date-sorted, so the first hit in the reversed array is the latest one
+        videos, first = np.unique(earlier[::-1], return_index=True)
+        last_seen = np.full(len(self.video_ids), -1, dtype=np.int64)
+        last_seen[videos] = day.start - 1 - first
+        return last_seen[self.video[day]]
+
+    # --- queries (mirror py_scripts/queries.py) ------------------------------
+
+    def fetch_top_videos_by_views(self, limit=10):
+        day, _ = self._day()
+        if day is None:
+            return pd.DataFrame(columns=['video_id', 'title', 'view_count'])
+        views = self.view_count[day]
+        top = np.argsort(-views, kind='stable')[:limit]
+        video = self.video[day][top]
+        return pd.DataFrame({
+            'video_id': self.video_ids[video],
+            'title': self.video_titles[video],
+            'view_count': views[top],
+        })
+
+    def _lagged(self, column):
+        day, date = self._day()
+        if day is None:
+            return None, None, None, None
+        prev = self._previous_rows(day)
+        seen = prev >= 0
+        rows = np.arange(day.start, day.stop)[seen]
+        values = getattr(self, column)
+        return date, rows, np.asarray(values[rows]), np.asarray(values[prev[seen]])
+
+    def daily_growth_in_views(self):
+        date, rows, views, previous = self._lagged('view_count')
+        columns = ['video_id', 'title', 'fetched_date', 'view_count', 'previous_view_count', 'daily_view_growth']
+        if date is None:
+            return pd.DataFrame(columns=columns)
+        growth = views - previous
+        order = np.argsort(-growth, kind='stable')
+        video = self.video[rows[order]]
+        return pd.DataFrame({
+            'video_id': self.video_ids[video],
+            'title': self.video_titles[video],
+            'fetched_date': date,
+            'view_count': views[order],
+            'previous_view_count': previous[order],
+            'daily_view_growth': growth[order],
+        }, columns=columns)
+
+    def daily_rank_movers(self):
+        date, rows, rank, previous = self._lagged('rank')
+        columns = ['video_id', 'title', 'fetched_date', 'rank', 'previous_rank', 'daily_rank_change']
+        if date is None:
+            return pd.DataFrame(columns=columns)
+        change = previous - rank
+        moved = change != 0
+        rows, rank, previous, change = rows[moved], rank[moved], previous[moved], change[moved]
+        order = np.argsort(-np.abs(change), kind='stable')
+        video = self.video[rows[order]]
+        return pd.DataFrame({
+            'video_id': self.video_ids[video],
+            'title': self.video_titles[video],
+            'fetched_date': date,
+            'rank': rank[order],
+            'previous_rank': previous[order],
+            'daily_rank_change': change[order],
+        }, columns=columns)
+
+    def new_entries(self):
+        columns = ['video_id', 'title', 'fetched_date']
+        day, date = self._day()
+        if day is None:
+            return pd.DataFrame(columns=columns)
+        video = np.asarray(self.video[day])
+        rank = np.asarray(self.rank[day])
+        prev_day, _ = self._day(-2)
+        if prev_day is not None:
+            new = ~np.isin(video, self.video[prev_day])
+            video, rank = video[new], rank[new]
+        # Day slices are in video-code order; return them in snapshot (rank) order like the SQL
+        video = video[np.argsort(rank, kind='stable')]
+        return pd.DataFrame({
+            'video_id': self.video_ids[video],
+            'title': self.video_titles[video],
+            'fetched_date': date,
+        }, columns=columns)
+
+    def channel_insights(self):
+        columns = ['channel_id', 'channel_title', 'view_count']
+        day, _ = self._day()
+        if day is None:
+            return pd.DataFrame(columns=columns)
+        # np.add.at rather than bincount, whose float weights would lose precision on big counts
+        totals = np.zeros(len(self.channel_ids), dtype=np.int64)
+        np.add.at(totals, self.channel[day], self.view_count[day])
+        channels = np.unique(self.channel[day])
+        totals = totals[channels]
+        order = np.argsort(-totals, kind='stable')
+        return pd.DataFrame({
+            'channel_id': self.channel_ids[channels[order]],
+            'channel_title': self.channel_titles[channels[order]],
+            'view_count': totals[order],
+        }, columns=columns)
+
+
+def fetch_freshness(conn):
+    try:
+        row = conn.execute(GENERATION_QUERY).fetchone()
+        generation = row[0] if row else None
+    except Exception:
+        # Table not created yet: no load has run since the generation counter was added
+        generation = None
+    return [generation] + list(conn.execute(FRESHNESS_QUERY).fetchone())
+
+
+def load_history(cache_dir=CACHE_DIR, refresh=False):
+    """
+    Returns the youtube_data history, memory-mapped from cache_dir when the cache still
+    matches the table (load generation and a fingerprint of every cached column), otherwise
+    rebuilt from the database. refresh=True skips the check and always rebuilds.
+    """
+    if not refresh and os.path.exists(os.path.join(cache_dir, 'meta.json')):
+        try:
+            history = SnapshotHistory.load(cache_dir)
+        except Exception as e:
+            logging.warning(f"Could not read history cache {cache_dir}, rebuilding: {e} ⚠️")
+            history = None
+        if history is not None:
+            conn = None
+            try:
+                conn = get_connection()
+                freshness = fetch_freshness(conn)
+            except Exception as e:
+                # Offline: a possibly stale cache beats no analytics at all
+                logging.warning(f"Could not check history cache freshness, using cache as is: {e} ⚠️")
+                return history
+            finally:
+                if conn: conn.close()
+            if freshness == history.freshness:
+                logging.info(f"Loaded history cache with {len(history)} rows from {cache_dir} ✅")
+                return history
+            logging.info(f"History cache {cache_dir} is stale ({history.freshness} != {freshness}), rebuilding")
+    history = SnapshotHistory.from_database()
+    history.save(cache_dir)
+    return history
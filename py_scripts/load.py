@@ -10,17 +10,7 @@ os.makedirs('logs', exist_ok=True)
 db_url = os.getenv("db_url")
 db_auth = os.getenv("db_auth")
 
-def load_youtube_data(df):
-    try:
-        conn = libsql.connect(database=db_url,auth_token=db_auth)
-        logging.info("Connected to SQLite database successfully ✅")
-    except Exception as e:  
-        logging.error(f"Error connecting to SQLite database: {e}")
-        raise   
-    try:
-        conn = libsql.connect(database=db_url,auth_token=db_auth)
-        cursor = conn.cursor()
-        cursor.execute("""CREATE TABLE IF NOT EXISTS youtube_data (
+CREATE_TABLE_SQL = """CREATE TABLE IF NOT EXISTS youtube_data (
                        video_id TEXT,
                        title TEXT,
                        channel_id TEXT,
@@ -38,7 +28,33 @@ def load_youtube_data(df):
                        is_live BOOLEAN,
                        rank INTEGER,
                        fetched_date DATE,
-                       PRIMARY KEY (video_id, fetched_date))""")
+                       PRIMARY KEY (video_id, fetched_date))"""
+
+INSERT_SQL = """INSERT OR REPLACE INTO youtube_data (
+                        video_id, title, channel_id, channel_title, published_at, fetched_time, view_count, like_count, comment_count, category_id, duration, description, tags, thumbnail_url,is_live,rank,fetched_date) values(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)"""
+
+# Single-row counter bumped by every load, so readers such as the history cache
+# (py_scripts/history.py) can tell the table has been written to
+CREATE_GENERATION_SQL = """CREATE TABLE IF NOT EXISTS youtube_data_generation (
+                       id INTEGER PRIMARY KEY CHECK (id = 1),
+                       generation INTEGER NOT NULL)"""
+
+BUMP_GENERATION_SQL = """INSERT INTO youtube_data_generation (id, generation) VALUES (1, 1)
+                       ON CONFLICT(id) DO UPDATE SET generation = generation + 1"""
+
+LOAD_COLUMNS = ['video_id', 'title', 'channel_id', 'channel_title', 'published_at', 'fetched_time', 'view_count', 'like_count', 'comment_count', 'category_id', 'duration', 'description', 'tags', 'thumbnail_url', 'is_live', 'rank', 'fetch_date']
+
+def load_youtube_data(df):
+    try:
+        conn = libsql.connect(database=db_url,auth_token=db_auth)
+        logging.info("Connected to SQLite database successfully ✅")
+    except Exception as e:  
+        logging.error(f"Error connecting to SQLite database: {e}")
+        raise   
+    try:
+        conn = libsql.connect(database=db_url,auth_token=db_auth)
+        cursor = conn.cursor()
+        cursor.execute(CREATE_TABLE_SQL)
         logging.info("Table created successfully ✅")
     except Exception as e:
         logging.error(f"Error Creating Table in SQLite database: {e}")
@@ -46,10 +62,12 @@ def load_youtube_data(df):
     try:
         cursor = conn.cursor()
         for index, df in df.iterrows():
-            cursor.execute("""INSERT OR REPLACE INTO youtube_data (
-                        video_id, title, channel_id, channel_title, published_at, fetched_time, view_count, like_count, comment_count, category_id, duration, description, tags, thumbnail_url,is_live,rank,fetched_date) values(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+            cursor.execute(INSERT_SQL,
                         (df['video_id'], df['title'], df['channel_id'], df['channel_title'], df['published_at'], df['fetched_time'], df['view_count'], df['like_count'], df['comment_count'], df['category_id'], df['duration'], df['description'], df['tags'], df['thumbnail_url'], df['is_live'], df['rank'], df['fetch_date']))
             conn.commit()
+        cursor.execute(CREATE_GENERATION_SQL)
+        cursor.execute(BUMP_GENERATION_SQL)
+        conn.commit()
         logging.info("Data loaded into SQLite database successfully ✅")
     except Exception as e:
         logging.error(f"Error loading data into SQLite database: {e}")
@@ -66,7 +84,32 @@ def load_youtube_data(df):
     except Exception as e:
         logging.error(f"Error reading data from SQLite database: {e}")
         raise
-        
-        
 
-    
\ No newline at end of file
+
+def bulk_load_youtube_data(df):
+    """
+    Upserts a large DataFrame (e.g. a full reprocess of data/) in one transaction
+    with executemany, instead of a commit per row like load_youtube_data.
+    """
+    try:
+        conn = libsql.connect(database=db_url,auth_token=db_auth)
+        logging.info("Connected to SQLite database successfully ✅")
+    except Exception as e:
+        logging.error(f"Error connecting to SQLite database: {e}")
+        raise
+    try:
+        cursor = conn.cursor()
+        cursor.execute(CREATE_TABLE_SQL)
+        # Series.tolist() yields plain Python scalars, which the driver can bind
+        rows = list(zip(*(df[col].tolist() for col in LOAD_COLUMNS)))
+        cursor.executemany(INSERT_SQL, rows)
+        cursor.execute(CREATE_GENERATION_SQL)
+        cursor.execute(BUMP_GENERATION_SQL)
+        conn.commit()
+        logging.info(f"Bulk loaded {len(rows)} rows into SQLite database successfully ✅")
+    except Exception as e:
+        logging.error(f"Error bulk loading data into SQLite database: {e}")
+        raise
+    finally:
+        conn.close()
+        logging.info("SQLite database connection closed ✅")
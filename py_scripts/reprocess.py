@@ -0,0 +1,202 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from py_scripts.transform import make_dataframe, transform_youtube_data
+from py_scripts.validate import validate_youtube_data
+
+os.makedirs('logs', exist_ok=True)
+
+# Stable ordering for the merged frame so serial and parallel runs produce identical output
+SORT_COLUMNS = ['fetch_date', 'rank', 'video_id']
+
+
+def list_snapshot_files(data_dir='./data'):
+    """Returns the raw snapshot files in data_dir, oldest first."""
+    return sorted(glob.glob(os.path.join(data_dir, 'data_list_*.json')))
+
+
+def shard_files(files, n_shards):
+    """Splits files into at most n_shards contiguous, roughly equal shards."""
+    n_shards = max(1, min(n_shards, len(files)))
+    size, extra = divmod(len(files), n_shards)
+    shards, start = [], 0
+    for i in range(n_shards):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(files[start:end])
+        start = end
+    return shards
+
+
+def process_snapshot(json_file):
+    df = make_dataframe(json_file)
+    df = transform_youtube_data(df)
+    validate_youtube_data(df)
+    return df
+
+
+def process_shard(files):
+    """Transforms and validates every file in a shard. Runs inside a worker process."""
+    frames = [process_snapshot(f) for f in files]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def merge_shards(frames):
+    """Merges shard results, which must be in file order, into one deterministic frame."""
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    # Same key as the youtube_data primary key. Dedupe while still in file order, so the
+    # row from the latest file for a day wins, like INSERT OR REPLACE
+    dupes = df.duplicated(subset=['video_id', 'fetch_date'], keep='last')
+    if dupes.any():
+        logging.warning(f"Dropping {dupes.sum()} duplicate (video_id, fetch_date) rows across snapshots ⚠️")
+        df = df[~dupes]
+    return df.sort_values(SORT_COLUMNS, kind='mergesort').reset_index(drop=True)
+
+
+def report_progress(done, total):
+    # stderr, so it does not mix with the DataFrame previews make_dataframe prints to stdout
+    logging.info(f"Reprocessed {done}/{total} snapshot files")
+    print(f"Reprocessed {done}/{total} snapshot files", file=sys.stderr, flush=True)
+
+
+def reprocess_snapshots(data_dir='./data', workers=None):
+    """
+    Shards the snapshot files in data_dir across a process pool, transforms and validates
+    each shard in parallel and merges everything into one DataFrame ready for a bulk load.
+    workers=1 runs serially in the current process.
+    """
+    files = list_snapshot_files(data_dir)
+    if not files:
+        logging.warning(f"No snapshot files found in {data_dir} ⚠️")
+        return pd.DataFrame()
+
+    workers = workers or os.cpu_count() or 1
+    # A few shards per worker keeps the pool busy when files differ in size
+    shards = shard_files(files, workers * 4)
+    logging.info(f"Reprocessing {len(files)} snapshot files in {len(shards)} shards with {workers} worker(s)")
+
+    results = [None] * len(shards)
+    done = 0
+    if workers == 1:
+        for i, shard in enumerate(shards):
+            results[i] = process_shard(shard)
+            done += len(shard)
+            report_progress(done, len(files))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(process_shard, shard): i for i, shard in enumerate(shards)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    logging.error(f"Error reprocessing shard {shards[i][0]} .. {shards[i][-1]}: {e}")
+                    raise
+                done += len(shards[i])
+                report_progress(done, len(files))
+
+    df = merge_shards(results)
+    logging.info(f"Reprocessing completed successfully: {len(df)} rows from {len(files)} files ✅")
+    return df
+
+
+def make_synthetic_archive(data_dir, target_dir, scale):
+    """
+    Writes scale copies of every snapshot in data_dir into target_dir, for benchmarking.
+    Each copy is shifted forward in time by the span of the archive, so no rows collide
+    and the merge and bulk-load sizes scale with the file count.
+    """
+    files = list_snapshot_files(data_dir)
+    snapshots = []
+    for f in files:
+        with open(f) as fh:
+            snapshots.append(json.load(fh))
+    dates = [pd.Timestamp(row['fetch_date']) for rows in snapshots for row in rows]
+    span = (max(dates) - min(dates)).days + 1 if dates else 1
+
+    for f, rows in zip(files, snapshots):
+        stem = os.path.splitext(os.path.basename(f))[0]
+        for k in range(scale):
+            shift = pd.Timedelta(days=k * span)
+            copy = [dict(row, fetch_date=str((pd.Timestamp(row['fetch_date']) + shift).date())) for row in rows]
+            with open(os.path.join(target_dir, f"{stem}_{k:03d}.json"), 'w') as fh:
+                json.dump(copy, fh)
+    return target_dir
+
+
+def benchmark_reprocess(data_dir='./data', scale=10, workers=None):
+    """Times serial vs parallel reprocessing over a synthetically scaled copy of data_dir."""
+    workers = workers or os.cpu_count() or 1
+    if workers < 2:
+        logging.error("Reprocess benchmark needs at least 2 workers to compare against serial ❌")
+        raise ValueError(f"Benchmark needs at least 2 workers, got {workers} (os.cpu_count() = {os.cpu_count()})")
+    with tempfile.TemporaryDirectory() as tmp:
+        make_synthetic_archive(data_dir, tmp, scale)
+        n_files = len(list_snapshot_files(tmp))
+
+        start = time.perf_counter()
+        serial_df = reprocess_snapshots(tmp, workers=1)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel_df = reprocess_snapshots(tmp, workers=workers)
+        parallel_time = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(serial_df, parallel_df)
+    speedup = serial_time / parallel_time if parallel_time else float('inf')
+    msg = (f"{n_files} files ({len(serial_df)} rows) on {os.cpu_count()} core(s): serial {serial_time:.2f}s, "
+           f"{workers} workers {parallel_time:.2f}s, speedup {speedup:.2f}x")
+    logging.info(f"Reprocess benchmark: {msg}")
+    print(msg)
+    return {'files': n_files, 'rows': len(serial_df), 'cpus': os.cpu_count(), 'workers': workers, 'serial_s': serial_time,
+            'parallel_s': parallel_time, 'speedup': speedup}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reprocess every raw snapshot in data/ and bulk load the result.")
+    parser.add_argument('--data-dir', default='./data')
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--no-load', action='store_true', help="transform and validate only, skip the database load")
+    parser.add_argument('--benchmark', type=int, metavar='SCALE', default=None,
+                        help="time serial vs parallel on data/ copied SCALE times, then exit")
+    args = parser.parse_args(argv)
+    if args.benchmark is not None and args.benchmark < 1:
+        parser.error("--benchmark SCALE must be at least 1")
+
+    if args.benchmark is not None:
+        benchmark_reprocess(args.data_dir, scale=args.benchmark, workers=args.workers)
+        return
+
+    df = reprocess_snapshots(args.data_dir, workers=args.workers)
+    if df.empty or args.no_load:
+        return
+
+    from py_scripts.load import bulk_load_youtube_data
+    bulk_load_youtube_data(df)
+
+    # The bulk load bumps the generation, so the cache would be rebuilt on next use anyway;
+    # rebuilding here just moves that cost off the next reader
+    try:
+        from py_scripts.history import load_history
+        load_history(refresh=True)
+    except Exception as e:
+        logging.warning(f"Could not rebuild history cache after reprocess: {e} ⚠️")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, filename='./logs/main.log',
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    from dotenv import load_dotenv
+    load_dotenv()
+    main(sys.argv[1:])